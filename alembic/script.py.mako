@@ -1,4 +1,4 @@
-# alembic/script.py.mako
+## alembic/script.py.mako
 """${message}
 
 Revision ID: ${up_revision}
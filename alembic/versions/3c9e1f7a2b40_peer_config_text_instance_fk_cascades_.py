@@ -0,0 +1,123 @@
+"""peer config_text, instance FK cascades, list indexes
+
+Brings a database created from the original models up to the current ones:
+
+- peers.config_text, backfilled from configs/<instance>/peer_<id>.conf
+- ON DELETE CASCADE on peers.instance_id and alloc_state.instance_id
+- ck_alloc_state_last_octet (last_octet < 254)
+- ix_instance_user_created and ix_peer_instance_created (owner, created_at DESC)
+- drops ix_peers_instance_id, which the composite index covers
+
+Every step checks the live schema first, so databases that create_all already built
+part or all of the way are safe to upgrade. Run it from the repo root with the API's
+DATABASE_URL; the config files are read from backend/configs unless overridden with
+`alembic -x configs_dir=<path> upgrade head`. Peers whose file isn't found stay NULL
+and the API adopts their file on first read.
+
+Revision ID: 3c9e1f7a2b40
+Revises:
+Create Date: 2026-10-14 18:58:29.632762
+
+"""
+import os
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e1f7a2b40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Gives SQLite's unnamed FKs the name Postgres uses by default, so batch ops can drop them
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+peers = sa.table("peers", sa.column("id", sa.Integer), sa.column("instance_id", sa.Integer), sa.column("config_text", sa.Text))
+
+
+def _configs_dir() -> str:
+    return context.get_x_argument(as_dictionary=True).get("configs_dir", "backend/configs")
+
+
+def _instance_fk(inspector, table: str):
+    return next(fk for fk in inspector.get_foreign_keys(table) if fk["referred_table"] == "instances")
+
+
+def _set_instance_fk(batch, table: str, fk, ondelete) -> None:
+    name = fk["name"] or f"{table}_instance_id_fkey"
+    batch.drop_constraint(name, type_="foreignkey")
+    batch.create_foreign_key(name, "instances", ["instance_id"], ["id"], ondelete=ondelete)
+
+
+def _has_cascade(fk) -> bool:
+    return (fk.get("options") or {}).get("ondelete", "").upper() == "CASCADE"
+
+
+def _index_names(inspector, table: str) -> set:
+    return {ix["name"] for ix in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    needs_column = "config_text" not in {c["name"] for c in inspector.get_columns("peers")}
+    peer_fk = _instance_fk(inspector, "peers")
+    if needs_column or not _has_cascade(peer_fk):
+        with op.batch_alter_table("peers", naming_convention=NAMING_CONVENTION) as batch:
+            if needs_column:
+                batch.add_column(sa.Column("config_text", sa.Text(), nullable=True))
+            if not _has_cascade(peer_fk):
+                _set_instance_fk(batch, "peers", peer_fk, "CASCADE")
+
+    # Adopt the per-peer files the API used to write; the rows become the source of truth
+    configs_dir = _configs_dir()
+    missing = bind.execute(sa.select(peers.c.id, peers.c.instance_id).where(peers.c.config_text.is_(None))).all()
+    for peer_id, instance_id in missing:
+        path = os.path.join(configs_dir, str(instance_id), f"peer_{peer_id}.conf")
+        if os.path.exists(path):
+            with open(path) as f:
+                bind.execute(peers.update().where(peers.c.id == peer_id).values(config_text=f.read()))
+
+    alloc_fk = _instance_fk(inspector, "alloc_state")
+    needs_check = "ck_alloc_state_last_octet" not in {ck["name"] for ck in inspector.get_check_constraints("alloc_state")}
+    if needs_check or not _has_cascade(alloc_fk):
+        with op.batch_alter_table("alloc_state", naming_convention=NAMING_CONVENTION) as batch:
+            if not _has_cascade(alloc_fk):
+                _set_instance_fk(batch, "alloc_state", alloc_fk, "CASCADE")
+            if needs_check:
+                batch.create_check_constraint("ck_alloc_state_last_octet", "last_octet < 254")
+
+    # Fresh inspector: a batch recreate may have dropped indexes it couldn't reflect
+    inspector = sa.inspect(bind)
+    if "ix_instance_user_created" not in _index_names(inspector, "instances"):
+        op.create_index("ix_instance_user_created", "instances", ["user_id", sa.text("created_at DESC")])
+    peer_indexes = _index_names(inspector, "peers")
+    if "ix_peers_instance_id" in peer_indexes:
+        op.drop_index("ix_peers_instance_id", table_name="peers")
+    if "ix_peer_instance_created" not in peer_indexes:
+        op.create_index("ix_peer_instance_created", "peers", ["instance_id", sa.text("created_at DESC")])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    op.drop_index("ix_peer_instance_created", table_name="peers")
+    op.drop_index("ix_instance_user_created", table_name="instances")
+
+    with op.batch_alter_table("alloc_state", naming_convention=NAMING_CONVENTION) as batch:
+        batch.drop_constraint("ck_alloc_state_last_octet", type_="check")
+        _set_instance_fk(batch, "alloc_state", _instance_fk(inspector, "alloc_state"), None)
+
+    # The old code reads configs from disk: write them back before the column goes
+    configs_dir = _configs_dir()
+    for peer_id, instance_id, config_text in bind.execute(sa.select(peers).where(peers.c.config_text.is_not(None))):
+        os.makedirs(os.path.join(configs_dir, str(instance_id)), exist_ok=True)
+        with open(os.path.join(configs_dir, str(instance_id), f"peer_{peer_id}.conf"), "w") as f:
+            f.write(config_text)
+
+    with op.batch_alter_table("peers", naming_convention=NAMING_CONVENTION) as batch:
+        _set_instance_fk(batch, "peers", _instance_fk(inspector, "peers"), None)
+        batch.drop_column("config_text")
@@ -1,28 +1,49 @@
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, status
+from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from fastapi.responses import FileResponse, ORJSONResponse, Response
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from pydantic import BaseModel, EmailStr, field_validator
 import os
 import logging
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 import asyncio
-import qrcode
+import threading
+import segno
 from io import BytesIO
-import base64
+import hashlib
+import time
+import orjson
+import glob
+import shutil
 from pathlib import Path
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from starlette.concurrency import run_in_threadpool
+import anyio.to_thread
+from arq import create_pool
+from arq.connections import RedisSettings
+from cachetools import LRUCache, TTLCache
 
 load_dotenv()
 
 MAX_INSTANCES_PER_USER = int(os.getenv("MAX_INSTANCES_PER_USER", 3))
+CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "http://localhost:5173").split(",") if o.strip()]
+THREAD_POOL_SIZE = int(os.getenv("THREAD_POOL_SIZE", 40))
+QR_CACHE_SIZE = int(os.getenv("QR_CACHE_SIZE", 1024))
+PEER_LIST_CACHE_TTL = int(os.getenv("PEER_LIST_CACHE_TTL", 5))
 
 from models import Base, User, Instance, Peer, AllocState
-from auth import get_password_hash, verify_password, create_access_token, decode_token, oauth2_scheme
-from utils import launch_instance_async, stop_instance, terminate_instance, WG_SUBNET_PREFIX, WG_PORT
+from database import engine, dialect_insert, get_db
+from worker import launch_instance, launch_job_id, REDIS_URL
+from auth import get_password_hash, verify_password, password_needs_rehash, create_access_token, decode_token, oauth2_scheme, get_cached_user, cache_user
+from utils import stop_instance, terminate_instance, WG_SUBNET_PREFIX, WG_PORT
 
 # Logging
 logging.basicConfig(
@@ -32,52 +53,159 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Database
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./tunnel_platform.db")
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base.metadata.create_all(bind=engine)
+HEALTH_PATHS = ("/api/health", "/health")
+
+class _HealthAccessFilter(logging.Filter):
+    """Keep liveness probes out of the uvicorn access log"""
+    def filter(self, record):
+        return not (isinstance(record.args, tuple) and len(record.args) > 2 and record.args[2] in HEALTH_PATHS)
+
+logging.getLogger("uvicorn.access").addFilter(_HealthAccessFilter())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Size both worker pools: asyncio's default executor and the anyio
+    # limiter that run_in_threadpool draws from
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_POOL_SIZE
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # Instance launches and terminations go to the arq worker when Redis is configured
+    app.state.arq = await create_pool(RedisSettings.from_dsn(REDIS_URL)) if REDIS_URL else None
+    if app.state.arq is None:
+        logger.warning("REDIS_URL not set - instance launches and terminations run in-process")
+    yield
+    if app.state.arq is not None:
+        await app.state.arq.close()
+    await engine.dispose()
+
+class _APIResponse(ORJSONResponse):
+    """orjson with second-precision timestamps; the UI never shows sub-second times"""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_OMIT_MICROSECONDS)
 
 # FastAPI
-app = FastAPI(title="Tunnel Platform API", version="2.0.0")
+app = FastAPI(title="Tunnel Platform API", version="2.0.0", lifespan=lifespan, default_response_class=_APIResponse)
 
-# CORS - Allow all for development
+# JSON, configs and QR SVGs are all text and compress well; under ~512 bytes the
+# gzip framing eats most of the savings
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
+# CORS - explicit allowlist (comma-separated CORS_ORIGINS); preflights cached for a day.
+# Added last so it is outermost: preflights are answered before the gzip wrapper runs
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["authorization", "content-type"],
+    max_age=86400,
 )
 
-# Health check endpoints
-@app.get("/api/health")
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
+# Health check endpoints - raw routes skip dependency resolution and validation,
+# and the body is rebuilt at most once per second
+_HEALTH = {"body": b"", "ts": 0.0}
+
+async def health_check(request: Request):
+    now = time.monotonic()
+    if now - _HEALTH["ts"] > 1.0:
+        _HEALTH["body"] = orjson.dumps({"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds")})
+        _HEALTH["ts"] = now
+    return Response(_HEALTH["body"], media_type="application/json")
+
+for _path in HEALTH_PATHS:
+    app.add_route(_path, health_check, methods=["GET"])
+
+def _qr_cache_prefix(peer: Peer) -> str:
+    return f"configs/{peer.instance_id}/peer_{peer.id}"
 
-def get_db():
-    db = SessionLocal()
+def _config_digest(config: str) -> str:
+    return hashlib.blake2b(config.encode(), digest_size=8).hexdigest()
+
+def _read_file(path: str):
+    """Return file bytes, or None if it doesn't exist"""
     try:
-        yield db
-    finally:
-        db.close()
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+async def _adopt_legacy_config(db: AsyncSession, peer_id: int, instance_id: int):
+    """Peers created before config_text existed have their config in configs/<instance>/peer_<id>.conf:
+    read it once and persist it on the row. Returns None if there is no file either"""
+    data = await run_in_threadpool(_read_file, f"configs/{instance_id}/peer_{peer_id}.conf")
+    if data is None:
+        return None
+    config = data.decode()
+    await db.execute(update(Peer).where(Peer.id == peer_id, Peer.config_text.is_(None)).values(config_text=config))
+    await db.commit()
+    logger.info(f"Adopted legacy config file for peer {peer_id}")
+    return config
+
+# Hot QR SVGs in memory (~5 KiB each) in front of the disk cache, keyed by cache path
+_qr_memory = LRUCache(maxsize=QR_CACHE_SIZE)
+_qr_memory_lock = threading.Lock()
+
+# Peer lists for the frontend's polling: (user_id, instance_id) -> rows. Only touched from
+# the event loop, so no lock; writers drop their key, the TTL covers other workers
+_peer_lists = TTLCache(maxsize=4096, ttl=PEER_LIST_CACHE_TTL)
+
+def _qr_path(prefix: str, config: str) -> str:
+    # Content hash in the name so a changed config never serves a stale QR
+    return f"{prefix}.{_config_digest(config)}.qr.svg"
+
+def _cached_qr(prefix: str, config: str):
+    """Return the in-memory QR SVG for config, or None"""
+    with _qr_memory_lock:
+        return _qr_memory.get(_qr_path(prefix, config))
+
+def _remove_qr_cache(prefix: str):
+    with _qr_memory_lock:
+        for key in [k for k in _qr_memory if k.startswith(f"{prefix}.")]:
+            del _qr_memory[key]
+    # QR cache files, plus the .conf a pre-config_text peer may still have on disk
+    for path in glob.glob(f"{prefix}.*"):
+        os.remove(path)
+
+def _render_qr(config: str) -> bytes:
+    """Encode config as an SVG QR code (one path element, no raster/zlib work; run in threadpool)"""
+    qr = segno.make_qr(config, error="l")
+    buf = BytesIO()
+    qr.save(buf, kind="svg", scale=10, border=4, xmldecl=False)
+    return buf.getvalue()
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _load_qr(prefix: str, config: str) -> bytes:
+    """Return the QR SVG for config, rendering and caching it on disk on a miss"""
+    qr_path = _qr_path(prefix, config)
+    svg = _read_file(qr_path)
+    if svg is None:
+        svg = _render_qr(config)
+        os.makedirs(os.path.dirname(qr_path), exist_ok=True)
+        # Write-then-rename so a concurrent reader never sees a partial SVG
+        tmp_path = f"{qr_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(svg)
+        os.replace(tmp_path, qr_path)
+    with _qr_memory_lock:
+        _qr_memory[qr_path] = svg
+    return svg
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     try:
+        # A hit means this exact token was already verified and hasn't expired: skip the decode
+        user = get_cached_user(token)
+        if user:
+            return user
         payload = decode_token(token)
         email = payload.get("sub")
         if not email:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = db.query(User).filter(User.email == email).first()
+        user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
+        # Detach so later commits in this session don't expire the cached copy
+        db.expunge(user)
+        cache_user(token, user, payload["exp"])
         return user
     except Exception as e:
         logger.error(f"Auth error: {str(e)}")
@@ -103,49 +231,63 @@ class PeerCreate(BaseModel):
     name: str
     device_type: str = "phone"
 
-# Background task
-async def launch_instance_task(instance_id: int):
-    db = SessionLocal()
-    try:
-        instance = db.query(Instance).filter(Instance.id == instance_id).first()
-        if instance:
-            await launch_instance_async(db, instance)
-    except Exception as e:
-        logger.error(f"Background launch error: {str(e)}")
-        if instance:
-            instance.state = "failed"
-            db.commit()
-    finally:
-        db.close()
+# Client config, filled per peer in create_peer
+_WG_TEMPLATE = """[Interface]
+PrivateKey = <GENERATE_ON_CLIENT>
+Address = {peer_ip}/32
+DNS = 1.1.1.1, 8.8.8.8
+
+[Peer]
+PublicKey = <SERVER_PUBLIC_KEY>
+AllowedIPs = 0.0.0.0/0, ::/0
+Endpoint = {endpoint}:{port}
+PersistentKeepalive = 25
+"""
+
+# Background tasks
+def cleanup_instance_task(instance_id: int, aws_instance_id: str = None):
+    """Terminate the EC2 instance and drop its cached QR codes (runs in threadpool)"""
+    if aws_instance_id:
+        try:
+            terminate_instance(aws_instance_id)
+        except Exception as e:
+            logger.error(f"AWS termination error: {str(e)}")
+    shutil.rmtree(f"configs/{instance_id}", ignore_errors=True)
 
 # ==================== AUTH ENDPOINTS ====================
 @app.post("/api/auth/register")
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     try:
-        if db.query(User).filter(User.email == user_data.email).first():
-            raise HTTPException(status_code=400, detail="Email already registered")
-        
-        hashed = get_password_hash(user_data.password)
+        hashed = await asyncio.to_thread(get_password_hash, user_data.password)
         user = User(email=user_data.email, password_hash=hashed)
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # UNIQUE(email) is the check: no pre-query, no race between concurrent signups
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Email already registered")
         logger.info(f"New user registered: {user_data.email}")
         return {"message": "User created", "email": user.email}
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Registration error: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/auth/login")
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     try:
-        user = db.query(User).filter(User.email == form_data.username).first()
-        if not user or not verify_password(form_data.password, user.password_hash):
+        user = (await db.execute(select(User).where(User.email == form_data.username))).scalar_one_or_none()
+        if not user or not await asyncio.to_thread(verify_password, form_data.password, user.password_hash):
             raise HTTPException(status_code=401, detail="Incorrect email or password")
         
+        # Rotate hashes made under older Argon2 parameters while we have the plaintext
+        if password_needs_rehash(user.password_hash):
+            user.password_hash = await asyncio.to_thread(get_password_hash, form_data.password)
+            await db.commit()
+        
         token = create_access_token({"sub": user.email})
         logger.info(f"User logged in: {user.email}")
         return {"access_token": token, "token_type": "bearer"}
@@ -157,25 +299,30 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
 
 # ==================== INSTANCE ENDPOINTS ====================
 @app.get("/api/instances")
-async def list_instances(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def list_instances(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     try:
-        instances = db.query(Instance).filter(Instance.user_id == current_user.id).order_by(Instance.created_at.desc()).all()
-        
-        result = []
-        for inst in instances:
-            peer_count = db.query(Peer).filter(Peer.instance_id == inst.id).count()
-            result.append({
-                "id": inst.id,
-                "state": inst.state,
-                "public_ip": inst.public_ip,
-                "aws_instance_id": inst.aws_instance_id,
-                "instance_type": inst.instance_type,
-                "region": inst.region,
-                "created_at": inst.created_at.isoformat() if inst.created_at else None,
-                "peer_count": peer_count
-            })
-        
-        return result
+        # Count peers per instance_id off the peers index, then join the totals back,
+        # so the grouping never has to carry every Instance column
+        peer_counts = select(
+            Peer.instance_id, func.count().label("peer_count")
+        ).join(Instance).where(
+            Instance.user_id == current_user.id
+        ).group_by(Peer.instance_id).subquery()
+        # Plain columns, not ORM objects: rows go straight into dicts, no identity map
+        rows = (await db.execute(
+            select(
+                Instance.id, Instance.state, Instance.public_ip, Instance.aws_instance_id,
+                Instance.instance_type, Instance.region, Instance.created_at,
+                func.coalesce(peer_counts.c.peer_count, 0).label("peer_count")
+            ).outerjoin(
+                peer_counts, peer_counts.c.instance_id == Instance.id
+            ).where(
+                Instance.user_id == current_user.id
+            ).order_by(Instance.created_at.desc())
+        )).mappings()
+        
+        # Returning the response directly skips jsonable_encoder; orjson formats the datetimes
+        return _APIResponse([dict(row) for row in rows])
     except Exception as e:
         logger.error(f"List instances error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -183,12 +330,15 @@ async def list_instances(current_user: User = Depends(get_current_user), db: Ses
 @app.post("/api/instances")
 async def create_instance(
     instance_data: InstanceCreate,
+    request: Request,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        count = db.query(Instance).filter(Instance.user_id == current_user.id).count()
+        count = await db.scalar(
+            select(func.count()).select_from(Instance).where(Instance.user_id == current_user.id)
+        )
         if count >= MAX_INSTANCES_PER_USER:
             raise HTTPException(status_code=400, detail=f"Maximum {MAX_INSTANCES_PER_USER} instances allowed")
 
@@ -199,11 +349,14 @@ async def create_instance(
             state="launching"
         )
         db.add(instance)
-        db.commit()
-        db.refresh(instance)
+        await db.commit()
+        await db.refresh(instance)
 
         logger.info(f"Instance {instance.id} created for {current_user.email}")
-        background_tasks.add_task(launch_instance_task, instance.id)
+        if request.app.state.arq is not None:
+            await request.app.state.arq.enqueue_job("launch_instance", instance.id, _job_id=launch_job_id(instance.id))
+        else:
+            background_tasks.add_task(launch_instance, {}, instance.id)
 
         return {
             "message": "Instance launching...",
@@ -214,42 +367,46 @@ async def create_instance(
         raise
     except Exception as e:
         logger.error(f"Create instance error: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/instances/{instance_id}")
 async def delete_instance(
     instance_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        instance = db.query(Instance).filter(
-            Instance.id == instance_id,
-            Instance.user_id == current_user.id
-        ).first()
-        
-        if not instance:
+        # One ownership-checked DELETE; peers and alloc state go with it via ON DELETE CASCADE
+        # (databases from before the cascade get it from `alembic upgrade head`)
+        deleted = (await db.execute(
+            delete(Instance).where(
+                Instance.id == instance_id,
+                Instance.user_id == current_user.id
+            ).returning(Instance.aws_instance_id)
+        )).one_or_none()
+        
+        if not deleted:
             raise HTTPException(status_code=404, detail="Instance not found")
         
-        if instance.aws_instance_id:
-            try:
-                terminate_instance(instance.aws_instance_id)
-            except Exception as e:
-                logger.error(f"AWS termination error: {str(e)}")
-        
-        db.query(Peer).filter(Peer.instance_id == instance_id).delete()
-        db.query(AllocState).filter(AllocState.instance_id == instance_id).delete()
-        db.delete(instance)
-        db.commit()
+        await db.commit()
+        _peer_lists.pop((current_user.id, instance_id), None)
         
+        # EC2 teardown never runs on the request path: the worker owns it when there is one
+        aws_instance_id = deleted.aws_instance_id
+        if aws_instance_id and request.app.state.arq is not None:
+            await request.app.state.arq.enqueue_job("terminate_ec2", aws_instance_id)
+            aws_instance_id = None
+        background_tasks.add_task(cleanup_instance_task, instance_id, aws_instance_id)
         logger.info(f"Instance {instance_id} deleted")
         return {"message": "Instance deleted"}
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Delete instance error: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 # ==================== PEER ENDPOINTS ====================
@@ -257,30 +414,29 @@ async def delete_instance(
 async def list_peers(
     instance_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        instance = db.query(Instance).filter(
+        cached = _peer_lists.get((current_user.id, instance_id))
+        if cached is not None:
+            return _APIResponse(cached)
+        
+        owned = await db.scalar(select(Instance.id).where(
             Instance.id == instance_id,
             Instance.user_id == current_user.id
-        ).first()
+        ))
         
-        if not instance:
+        if owned is None:
             raise HTTPException(status_code=404, detail="Instance not found")
         
-        peers = db.query(Peer).filter(Peer.instance_id == instance_id).order_by(Peer.created_at.desc()).all()
-        
-        result = []
-        for peer in peers:
-            result.append({
-                "id": peer.id,
-                "name": peer.name,
-                "device_type": peer.device_type,
-                "assigned_ip": peer.assigned_ip,
-                "created_at": peer.created_at.isoformat() if peer.created_at else None
-            })
+        rows = (await db.execute(
+            select(Peer.id, Peer.name, Peer.device_type, Peer.assigned_ip, Peer.created_at)
+            .where(Peer.instance_id == instance_id).order_by(Peer.created_at.desc())
+        )).mappings()
         
-        return result
+        result = [dict(row) for row in rows]
+        _peer_lists[(current_user.id, instance_id)] = result
+        return _APIResponse(result)
     except HTTPException:
         raise
     except Exception as e:
@@ -291,14 +447,15 @@ async def list_peers(
 async def create_peer(
     instance_id: int,
     peer_data: PeerCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        instance = db.query(Instance).filter(
+        instance = (await db.execute(select(Instance).where(
             Instance.id == instance_id,
             Instance.user_id == current_user.id
-        ).first()
+        ))).scalar_one_or_none()
         
         if not instance:
             raise HTTPException(status_code=404, detail="Instance not found")
@@ -306,45 +463,36 @@ async def create_peer(
         if instance.state != "running":
             raise HTTPException(status_code=400, detail="Instance not ready. Wait for it to be running.")
         
-        alloc = db.query(AllocState).filter(AllocState.instance_id == instance.id).first()
-        if not alloc:
-            alloc = AllocState(instance_id=instance.id, last_octet=2)
-            db.add(alloc)
-            db.commit()
-            db.refresh(alloc)
-        
-        next_octet = alloc.last_octet + 1
-        if next_octet >= 254:
+        # One atomic upsert: seed .3 for a fresh instance, otherwise bump the octet.
+        # Concurrent requests never share an IP; a full pool matches no row and returns nothing
+        next_octet = (await db.execute(
+            dialect_insert(AllocState).values(instance_id=instance.id, last_octet=3)
+            .on_conflict_do_update(
+                index_elements=[AllocState.instance_id],
+                set_={"last_octet": AllocState.last_octet + 1},
+                where=AllocState.last_octet < 253
+            ).returning(AllocState.last_octet)
+        )).scalar_one_or_none()
+        if next_octet is None:
+            await db.rollback()
             raise HTTPException(status_code=400, detail="IP pool exhausted")
         
         peer_ip = f"{WG_SUBNET_PREFIX}.{next_octet}"
+        config = _WG_TEMPLATE.format_map({"peer_ip": peer_ip, "endpoint": instance.public_ip, "port": WG_PORT})
         
         peer = Peer(
             instance_id=instance.id,
             name=peer_data.name,
             device_type=peer_data.device_type,
-            assigned_ip=peer_ip
+            assigned_ip=peer_ip,
+            config_text=config
         )
         db.add(peer)
-        alloc.last_octet = next_octet
-        db.commit()
-        db.refresh(peer)
+        await db.commit()  # Allocation + peer land in a single commit
+        _peer_lists.pop((current_user.id, instance.id), None)
         
-        os.makedirs(f"configs/{instance.id}", exist_ok=True)
-        config = f"""[Interface]
-PrivateKey = <GENERATE_ON_CLIENT>
-Address = {peer_ip}/32
-DNS = 1.1.1.1, 8.8.8.8
-
-[Peer]
-PublicKey = <SERVER_PUBLIC_KEY>
-AllowedIPs = 0.0.0.0/0, ::/0
-Endpoint = {instance.public_ip}:{WG_PORT}
-PersistentKeepalive = 25
-"""
-        config_path = f"configs/{instance.id}/peer_{peer.id}.conf"
-        with open(config_path, "w") as f:
-            f.write(config)
+        # Warm the QR cache after the response goes out; a racing /qr fetch just renders it itself
+        background_tasks.add_task(_load_qr, _qr_cache_prefix(peer), config)
         
         logger.info(f"Peer {peer.id} created with IP {peer_ip}")
         
@@ -358,32 +506,41 @@ PersistentKeepalive = 25
         raise
     except Exception as e:
         logger.error(f"Create peer error: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/peers/{peer_id}/config")
 async def get_peer_config(
     peer_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        peer = db.query(Peer).join(Instance).filter(
+        peer = (await db.execute(select(Peer).options(
+            load_only(Peer.instance_id, Peer.config_text, Peer.name)
+        ).join(Instance).where(
             Peer.id == peer_id,
             Instance.user_id == current_user.id
-        ).first()
+        ))).scalar_one_or_none()
         
         if not peer:
             raise HTTPException(status_code=404, detail="Peer not found")
         
-        config_path = f"configs/{peer.instance_id}/peer_{peer.id}.conf"
-        if not os.path.exists(config_path):
-            raise HTTPException(status_code=404, detail="Config file not found")
+        config = peer.config_text
+        if config is None:
+            config = await _adopt_legacy_config(db, peer.id, peer.instance_id)
+        if config is None:
+            raise HTTPException(status_code=404, detail="Config not found")
         
-        with open(config_path, "r") as f:
-            config = f.read()
+        # Same digest as the QR's ETag: both change only when the config does
+        etag = f'"{_config_digest(config)}"'
+        # no-cache for the same reason as the QR: a reused peer id must never serve a stale config
+        headers = {"Cache-Control": "private, no-cache", "ETag": etag}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
         
-        return {"config": config, "peer_name": peer.name}
+        return _APIResponse({"config": config, "peer_name": peer.name}, headers=headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -393,45 +550,41 @@ async def get_peer_config(
 @app.get("/api/peers/{peer_id}/qr")
 async def get_peer_qr(
     peer_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        peer = db.query(Peer).join(Instance).filter(
-            Peer.id == peer_id,
-            Instance.user_id == current_user.id
-        ).first()
+        # Ownership check rides on the join; only the columns the QR needs come back
+        peer = (await db.execute(
+            select(Peer.id, Peer.instance_id, Peer.config_text).join(Instance).where(
+                Peer.id == peer_id,
+                Instance.user_id == current_user.id
+            )
+        )).one_or_none()
         
         if not peer:
             raise HTTPException(status_code=404, detail="Peer not found")
         
-        config_path = f"configs/{peer.instance_id}/peer_{peer.id}.conf"
-        if not os.path.exists(config_path):
+        config = peer.config_text
+        if config is None:
+            config = await _adopt_legacy_config(db, peer.id, peer.instance_id)
+        if config is None:
             raise HTTPException(status_code=404, detail="Config not found")
         
-        with open(config_path, "r") as f:
-            config = f.read()
+        # Format in the tag so clients holding the old PNG revalidate to the SVG
+        etag = f'"{_config_digest(config)}.svg"'
+        # no-cache, not max-age: SQLite reuses a deleted peer's id, so the URL can name a new peer.
+        # Revalidating every time is just a 304 while the config is unchanged
+        headers = {"Cache-Control": "private, no-cache", "ETag": etag}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
         
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4
-        )
-        qr.add_data(config)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        buf = BytesIO()
-        img.save(buf, format="PNG")
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.getvalue()).decode()
+        prefix = _qr_cache_prefix(peer)
+        svg = _cached_qr(prefix, config) or await run_in_threadpool(_load_qr, prefix, config)
         
-        logger.info(f"QR code generated for peer {peer_id}")
-        return {
-            "qr_code": f"data:image/png;base64,{img_base64}",
-            "peer_name": peer.name
-        }
+        logger.info(f"QR code served for peer {peer_id}")
+        return Response(content=svg, media_type="image/svg+xml", headers=headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -441,24 +594,26 @@ async def get_peer_qr(
 @app.delete("/api/peers/{peer_id}")
 async def delete_peer(
     peer_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        peer = db.query(Peer).join(Instance).filter(
+        peer = (await db.execute(select(Peer).options(
+            load_only(Peer.id, Peer.instance_id)
+        ).join(Instance).where(
             Peer.id == peer_id,
             Instance.user_id == current_user.id
-        ).first()
+        ))).scalar_one_or_none()
         
         if not peer:
             raise HTTPException(status_code=404, detail="Peer not found")
         
-        config_path = f"configs/{peer.instance_id}/peer_{peer.id}.conf"
-        if os.path.exists(config_path):
-            os.remove(config_path)
-        
-        db.delete(peer)
-        db.commit()
+        prefix = _qr_cache_prefix(peer)
+        await db.delete(peer)
+        await db.commit()
+        _peer_lists.pop((current_user.id, peer.instance_id), None)
+        background_tasks.add_task(_remove_qr_cache, prefix)
         
         logger.info(f"Peer {peer_id} deleted")
         return {"message": "Peer deleted"}
@@ -466,7 +621,7 @@ async def delete_peer(
         raise
     except Exception as e:
         logger.error(f"Delete peer error: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 # ==================== FRONTEND STATIC FILES ====================
@@ -474,8 +629,25 @@ async def delete_peer(
 frontend_path = Path(__file__).parent.parent / "frontend" / "dist"
 
 if frontend_path.exists():
+    class _HashedStaticFiles(StaticFiles):
+        """Vite content-hashes every file under assets/, so a name never changes meaning"""
+        def file_response(self, *args, **kwargs):
+            response = super().file_response(*args, **kwargs)
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+            return response
+    
     # Serve static assets
-    app.mount("/assets", StaticFiles(directory=str(frontend_path / "assets")), name="assets")
+    app.mount("/assets", _HashedStaticFiles(directory=str(frontend_path / "assets")), name="assets")
+    
+    # Root files (public/ copies: favicon, robots, ...) keep their names across builds, so
+    # they revalidate. Indexed with stat results at startup: changing them needs a restart
+    _STATIC = {
+        p.relative_to(frontend_path).as_posix(): (p, p.stat())
+        for p in frontend_path.rglob("*")
+        if p.is_file() and p.name != "index.html" and p.relative_to(frontend_path).parts[0] != "assets"
+    }
+    # index.html changes on every build: stat it per request so an in-place rebuild is served correctly
+    _INDEX = frontend_path / "index.html"
     
     # Serve index.html for all other routes (SPA fallback)
     @app.get("/{full_path:path}")
@@ -484,12 +656,14 @@ if frontend_path.exists():
         if full_path.startswith("api/"):
             raise HTTPException(status_code=404, detail="API endpoint not found")
         
-        file_path = frontend_path / full_path
-        if file_path.is_file():
-            return FileResponse(file_path)
+        static = _STATIC.get(full_path)
+        if static:
+            return FileResponse(static[0], stat_result=static[1], headers={"Cache-Control": "no-cache"})
         
         # SPA fallback - serve index.html
-        return FileResponse(frontend_path / "index.html")
+        if not _INDEX.is_file():
+            raise HTTPException(status_code=404, detail="Frontend index.html not found")
+        return FileResponse(_INDEX, headers={"Cache-Control": "no-cache"})
     
     logger.info(f"✅ Frontend mounted from: {frontend_path}")
 else:
@@ -1,9 +1,15 @@
 # backend/auth.py - ✅ ARGON2 EDITION (2025-ready)
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from cachetools import TLRUCache, TTLCache
+import hashlib
+import secrets
+import threading
+import time
 import os
 from dotenv import load_dotenv
 load_dotenv()  # ← ADD THIS LINE
@@ -12,25 +18,57 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 10080))
 
-# ✅ ARGON2: No limits, no warnings, future-proof
-pwd_context = CryptContext(
-    schemes=["argon2"], 
-    deprecated="auto",
-    # Tune for your server (adjust if needed)
-    argon2__time_cost=2,
-    argon2__memory_cost=65536,
-    argon2__parallelism=4,
-    argon2__hash_len=32,
-    argon2__salt_len=16
+# ✅ ARGON2: No limits, no warnings, future-proof (argon2-cffi directly, no passlib dispatch)
+ph = PasswordHasher(
+    # Tune for your server via env (hashing runs in a worker thread).
+    # Defaults are OWASP's m=19MiB/t=2/p=1 baseline, ~35-50 ms per hash on one core
+    time_cost=int(os.getenv("ARGON2_TIME_COST", 2)),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", 19456)),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", 1)),
+    hash_len=32,
+    salt_len=16
 )
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Authenticated user cache: token digest -> (detached User, token exp), saves the JWT decode
+# and a user lookup per request. Only decoded tokens get in, and never outlive their exp
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 60))
+
+def _user_ttu(key, value, now):
+    return min(now + AUTH_CACHE_TTL, value[1])
+
+_user_cache = TLRUCache(maxsize=10000, ttu=_user_ttu, timer=time.time)
+_user_cache_lock = threading.Lock()
+
+# Recent verify results, so a client retrying the same login doesn't pay for Argon2 each time.
+# Keys are a BLAKE2s MAC under a per-process secret: nothing password-derived is kept in the clear
+VERIFY_CACHE_TTL = int(os.getenv("VERIFY_CACHE_TTL", 30))
+_verify_cache = TTLCache(maxsize=4096, ttl=VERIFY_CACHE_TTL)
+_verify_cache_lock = threading.Lock()
+_verify_key = secrets.token_bytes(32)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    key = hashlib.blake2s(
+        hashed_password.encode() + b"\0" + plain_password.encode(), key=_verify_key
+    ).digest()
+    with _verify_cache_lock:
+        ok = _verify_cache.get(key)
+    if ok is None:
+        try:
+            ok = ph.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            ok = False
+        with _verify_cache_lock:
+            _verify_cache[key] = ok
+    return ok
 
 def get_password_hash(password: str) -> str:
     """Hash with Argon2 - NO 72-BYTE LIMIT! 🎉"""
-    return pwd_context.hash(password)
+    return ph.hash(password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with other Argon2 parameters than the current ones"""
+    return ph.check_needs_rehash(hashed_password)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -47,4 +85,23 @@ def decode_token(token: str):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
-        )
\ No newline at end of file
+        )
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def get_cached_user(token: str):
+    with _user_cache_lock:
+        entry = _user_cache.get(_token_key(token))
+    return entry[0] if entry else None
+
+def cache_user(token: str, user, exp: float):
+    with _user_cache_lock:
+        _user_cache[_token_key(token)] = (user, exp)
+
+def evict(email: str):
+    """Drop cached users for email (call on password change / logout)"""
+    with _user_cache_lock:
+        for key, (user, _) in list(_user_cache.items()):
+            if user.email == email:
+                del _user_cache[key]
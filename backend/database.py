@@ -0,0 +1,47 @@
+# backend/database.py - Async engine + session factory shared by the API and the worker
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./tunnel_platform.db")
+# Async drivers: aiosqlite for SQLite, asyncpg for Postgres
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://").replace("postgresql://", "postgresql+asyncpg://")
+engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    poolclass=AsyncAdaptedQueuePool,  # aiosqlite defaults to NullPool
+    pool_pre_ping=True,
+    pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+    max_overflow=int(os.getenv("DB_POOL_OVERFLOW", 20)),
+    pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", 30)),
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    # LIFO keeps a few hot connections busy and lets idle ones age out
+    pool_use_lifo=os.getenv("DB_POOL_LIFO", "1") == "1"
+)
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers run alongside the writer; NORMAL fsyncs per checkpoint, not per commit
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache per connection (default ~2 MiB)
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA foreign_keys=ON")  # needed for ON DELETE CASCADE
+        cursor.close()
+
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+# INSERT construct with ON CONFLICT support for the configured backend
+dialect_insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
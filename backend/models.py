@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, CheckConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -18,7 +18,7 @@ class User(Base):
 class Instance(Base):
     __tablename__ = "instances"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"))  # Indexed through ix_instance_user_created
     aws_instance_id = Column(String, unique=True, index=True)
     region = Column(String)
     public_ip = Column(String)
@@ -26,27 +26,36 @@ class Instance(Base):
     instance_type = Column(String, default="t2.micro")
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # Serves "WHERE user_id = ? ORDER BY created_at DESC" without a sort
+    __table_args__ = (Index("ix_instance_user_created", user_id, created_at.desc()),)
+    
     user = relationship("User", back_populates="instances")
-    peers = relationship("Peer", back_populates="instance")
-    alloc_state = relationship("AllocState", uselist=False, back_populates="instance")
+    peers = relationship("Peer", back_populates="instance", passive_deletes=True)
+    alloc_state = relationship("AllocState", uselist=False, back_populates="instance", passive_deletes=True)
 
 class Peer(Base):
     __tablename__ = "peers"
     id = Column(Integer, primary_key=True, index=True)
-    instance_id = Column(Integer, ForeignKey("instances.id"))
+    # Indexed through ix_peer_instance_created (leading column); no separate single-column index
+    instance_id = Column(Integer, ForeignKey("instances.id", ondelete="CASCADE"))
     name = Column(String)
     device_type = Column(String)  # laptop, phone, tablet
     wg_public_key = Column(String)
     wg_private_key = Column(String)  # In production, encrypt this!
     assigned_ip = Column(String)
+    config_text = Column(Text)  # Rendered client config
     created_at = Column(DateTime, default=datetime.utcnow)
     last_connected = Column(DateTime, nullable=True)
     
+    # Serves "WHERE instance_id = ? ORDER BY created_at DESC" without a sort
+    __table_args__ = (Index("ix_peer_instance_created", instance_id, created_at.desc()),)
+    
     instance = relationship("Instance", back_populates="peers")
 
 class AllocState(Base):
     __tablename__ = "alloc_state"
-    instance_id = Column(Integer, ForeignKey("instances.id"), primary_key=True)
+    __table_args__ = (CheckConstraint("last_octet < 254", name="ck_alloc_state_last_octet"),)
+    instance_id = Column(Integer, ForeignKey("instances.id", ondelete="CASCADE"), primary_key=True)
     last_octet = Column(Integer, default=2)  # Start from .3 (.2 used by userdata)
     
     instance = relationship("Instance", back_populates="alloc_state")
\ No newline at end of file
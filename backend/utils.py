@@ -3,37 +3,55 @@ import boto3
 import os
 import time
 import logging
+import threading
 from models import Instance, AllocState, Peer
-from sqlalchemy.orm import Session
+from database import dialect_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from botocore.exceptions import ClientError
-from functools import partial
+from functools import partial, lru_cache
 
 logger = logging.getLogger(__name__)
 
 WG_SUBNET_PREFIX = os.getenv("WG_SUBNET_PREFIX", "10.10.0")
 WG_PORT = int(os.getenv("WG_PORT", 51820))
+# instance_running polls every 15s; 40 tries (botocore's default) keeps the waiter's
+# thread inside the worker's launch deadline
+LAUNCH_WAIT_ATTEMPTS = int(os.getenv("LAUNCH_WAIT_ATTEMPTS", 40))
 
-async def launch_instance_async(db: Session, instance: Instance):
+_client_lock = threading.Lock()
+
+@lru_cache(maxsize=32)
+def _client(service: str, region: str = None):
+    """Shared boto3 client per (service, region); clients are thread-safe once built"""
+    # Building one loads botocore's service model, and the default session isn't thread-safe
+    with _client_lock:
+        return boto3.client(service, region_name=region)
+
+async def launch_instance_async(db: AsyncSession, instance: Instance):
     """Launch EC2 + WireGuard (auto-creates SG, no external setup needed)"""
     try:
+        # boto3 is blocking: every AWS call runs on a worker thread so the event loop keeps serving
         # Get latest Ubuntu AMI
-        ssm = boto3.client('ssm', region_name=instance.region)
-        ami_id = ssm.get_parameter(
+        ssm = _client('ssm', instance.region)
+        ami_id = (await asyncio.to_thread(
+            ssm.get_parameter,
             Name='/aws/service/canonical/ubuntu/server/24.04/stable/current/amd64/hvm/ebs-gp3/ami-id'
-        )['Parameter']['Value']
+        ))['Parameter']['Value']
 
-        ec2 = boto3.client('ec2', region_name=instance.region)
+        ec2 = _client('ec2', instance.region)
 
         # Create unique security group
         sg_name = f"wg-vpn-{instance.id}-{int(time.time())}"
-        sg = ec2.create_security_group(
+        sg = await asyncio.to_thread(
+            ec2.create_security_group,
             GroupName=sg_name,
             Description="WireGuard VPN"
         )
         sg_id = sg['GroupId']
 
         # Open ports
-        ec2.authorize_security_group_ingress(
+        await asyncio.to_thread(
+            ec2.authorize_security_group_ingress,
             GroupId=sg_id,
             IpPermissions=[
                 {'IpProtocol': 'udp', 'FromPort': WG_PORT, 'ToPort': WG_PORT, 'IpRanges': [{'CidrIp': '0.0.0.0/0'}]},
@@ -62,7 +80,8 @@ curl -s http://169.254.169.254/latest/meta-data/public-ipv4 > /etc/wireguard/pub
 """
 
         # Launch EC2
-        response = ec2.run_instances(
+        response = await asyncio.to_thread(
+            ec2.run_instances,
             ImageId=ami_id,
             InstanceType=instance.instance_type,
             MinCount=1,
@@ -77,43 +96,57 @@ curl -s http://169.254.169.254/latest/meta-data/public-ipv4 > /etc/wireguard/pub
 
         aws_id = response['Instances'][0]['InstanceId']
         instance.aws_instance_id = aws_id
-        db.commit()
+        await db.commit()
         logger.info(f"EC2 launched: {aws_id}")
+    except Exception as e:
+        logger.error(f"Launch failed: {str(e)}")
+        raise
+
+    await finish_launch_async(db, instance)
+
+async def finish_launch_async(db: AsyncSession, instance: Instance):
+    """Wait for a launched EC2 to run, then record its IP (also resumes an interrupted launch)"""
+    try:
+        ec2 = _client('ec2', instance.region)
+        aws_id = instance.aws_instance_id
 
         # Wait for running
         waiter = ec2.get_waiter('instance_running')
-        waiter.wait(InstanceIds=[aws_id])
+        await asyncio.to_thread(
+            waiter.wait, InstanceIds=[aws_id],
+            WaiterConfig={'Delay': 15, 'MaxAttempts': LAUNCH_WAIT_ATTEMPTS}
+        )
 
         # Get public IP
-        desc = ec2.describe_instances(InstanceIds=[aws_id])
+        desc = await asyncio.to_thread(ec2.describe_instances, InstanceIds=[aws_id])
         public_ip = desc['Reservations'][0]['Instances'][0]['PublicIpAddress']
         instance.public_ip = public_ip
         instance.state = "running"
 
-        # Allocate IPs
-        alloc = AllocState(instance_id=instance.id, last_octet=2)
-        db.add(alloc)
-        db.commit()
+        # Allocate IPs (a create_peer upsert may already have seeded the row)
+        await db.execute(
+            dialect_insert(AllocState).values(instance_id=instance.id, last_octet=2)
+            .on_conflict_do_nothing(index_elements=[AllocState.instance_id])
+        )
+        await db.commit()
 
         logger.info(f"Instance ready: {public_ip} | WG on {WG_PORT}")
     except Exception as e:
         logger.error(f"Launch failed: {str(e)}")
-        instance.state = "failed"
-        db.commit()
         raise
 
-async def wait_for_setup_async(db: Session, instance: Instance):
+async def wait_for_setup_async(db: AsyncSession, instance: Instance):
     """Wait for WireGuard setup to complete"""
     pass
 
-async def add_peer_async(db: Session, instance: Instance, peer: Peer):
+async def add_peer_async(db: AsyncSession, instance: Instance, peer: Peer):
     """Add peer to WireGuard server"""
     pass
 
 def stop_instance(aws_instance_id: str):
     """Stop EC2 instance - FIXED SIGNATURE"""
     try:
-        ec2 = boto3.client('ec2')
+        ec2 = _client('ec2')
         ec2.stop_instances(InstanceIds=[aws_instance_id])
         logger.info(f"Stopped instance: {aws_instance_id}")
     except ClientError as e:
@@ -123,7 +156,7 @@ def stop_instance(aws_instance_id: str):
 def terminate_instance(aws_instance_id: str):
     """Terminate EC2 instance - FIXED SIGNATURE"""
     try:
-        ec2 = boto3.client('ec2')
+        ec2 = _client('ec2')
         ec2.terminate_instances(InstanceIds=[aws_instance_id])
         logger.info(f"Terminated instance: {aws_instance_id}")
     except ClientError as e:
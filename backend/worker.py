@@ -0,0 +1,79 @@
+# backend/worker.py - arq worker for long-running AWS provisioning jobs
+# Run alongside the API with: arq worker.WorkerSettings
+import asyncio
+import logging
+import os
+from arq import Retry, func
+from arq.connections import RedisSettings
+from sqlalchemy import select
+from dotenv import load_dotenv
+load_dotenv()
+
+from database import SessionLocal, engine
+from models import Instance
+from utils import launch_instance_async, finish_launch_async, terminate_instance
+
+logger = logging.getLogger(__name__)
+
+# Unset REDIS_URL means no queue: the API falls back to in-process background tasks
+REDIS_URL = os.getenv("REDIS_URL")
+LAUNCH_MAX_TRIES = int(os.getenv("LAUNCH_MAX_TRIES", 3))
+# The instance_running waiter alone can take up to 10 minutes; arq's default is 5
+LAUNCH_JOB_TIMEOUT = int(os.getenv("LAUNCH_JOB_TIMEOUT", 900))
+# Our own deadline, a minute under arq's: arq's timeout cancels the job, which skips the
+# except below (CancelledError), counts as a final failure and leaves the row "launching"
+LAUNCH_DEADLINE = LAUNCH_JOB_TIMEOUT - 60
+
+def launch_job_id(instance_id: int) -> str:
+    """One launch job per instance: arq drops enqueues while this id is queued or running"""
+    return f"launch:{instance_id}"
+
+async def launch_instance(ctx, instance_id: int):
+    """Provision EC2 for an instance row; safe to retry (at-least-once delivery)"""
+    async with SessionLocal() as db:
+        instance = None
+        try:
+            instance = await db.get(Instance, instance_id)
+            if not instance or instance.state != "launching":
+                return
+            if instance.aws_instance_id:
+                # An earlier try got as far as run_instances: resume instead of launching a second EC2
+                step = finish_launch_async(db, instance)
+            else:
+                step = launch_instance_async(db, instance)
+            try:
+                await asyncio.wait_for(step, LAUNCH_DEADLINE)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"launch did not finish within {LAUNCH_DEADLINE}s") from None
+        except Exception as e:
+            await db.rollback()
+            # In-process fallback (no arq ctx) gets a single try
+            job_try = ctx.get("job_try", LAUNCH_MAX_TRIES)
+            if instance and job_try < LAUNCH_MAX_TRIES:
+                logger.warning(f"Launch try {job_try} for instance {instance_id} failed, retrying: {str(e)}")
+                raise Retry(defer=30 * job_try)
+            logger.error(f"Background launch error: {str(e)}")
+            if instance:
+                instance.state = "failed"
+                await db.commit()
+
+async def terminate_ec2(ctx, aws_instance_id: str):
+    """Terminate an EC2 instance; TerminateInstances is idempotent, so redelivery is harmless"""
+    await asyncio.to_thread(terminate_instance, aws_instance_id)
+
+async def startup(ctx):
+    """Re-queue launches left in "launching" by a crashed API process or worker"""
+    async with SessionLocal() as db:
+        stuck = (await db.scalars(select(Instance.id).where(Instance.state == "launching"))).all()
+    for instance_id in stuck:
+        if await ctx["redis"].enqueue_job("launch_instance", instance_id, _job_id=launch_job_id(instance_id)):
+            logger.info(f"Re-queued launch for instance {instance_id}")
+
+async def shutdown(ctx):
+    await engine.dispose()
+
+class WorkerSettings:
+    functions = [func(launch_instance, max_tries=LAUNCH_MAX_TRIES, timeout=LAUNCH_JOB_TIMEOUT), terminate_ec2]
+    redis_settings = RedisSettings.from_dsn(REDIS_URL or "redis://localhost:6379")
+    on_startup = startup
+    on_shutdown = shutdown
@@ -151,7 +151,7 @@ echo "📦 Setting up backend..."
 cd /home/ubuntu/app
 python3 -m venv venv
 source venv/bin/activate
-pip install fastapi uvicorn sqlalchemy python-jose[cryptography] passlib[argon2] python-multipart boto3 qrcode pillow python-dotenv pydantic[email] argon2-cffi
+pip install fastapi uvicorn sqlalchemy[asyncio] aiosqlite asyncpg python-jose[cryptography] python-multipart boto3 segno python-dotenv pydantic[email] argon2-cffi cachetools orjson arq
 
 echo "🔧 Configuring systemd service..."
 sudo tee /etc/systemd/system/tunnel-platform.service > /dev/null << 'SERVICE'
@@ -160,7 +160,7 @@ echo mkdir -p app
 echo cd app
 echo python3 -m venv venv
 echo source venv/bin/activate
-echo pip install fastapi uvicorn sqlalchemy python-jose[cryptography] passlib[argon2] python-multipart boto3 qrcode pillow python-dotenv pydantic[email] argon2-cffi
+echo pip install fastapi uvicorn sqlalchemy[asyncio] aiosqlite asyncpg python-jose[cryptography] python-multipart boto3 segno python-dotenv pydantic[email] argon2-cffi cachetools orjson arq
 echo echo "Creating systemd service..."
 echo cat ^> /etc/systemd/system/tunnel-platform.service ^<^< 'SERVICE'
 echo [Unit]
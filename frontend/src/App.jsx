@@ -197,9 +197,7 @@ export default function TunnelPlatform() {
       fetchPeers(selectedInstance.id);
       
       // Auto-show QR code
-      const qr = await apiFetch(`/peers/${res.peer_id}/qr`);
-      setQrData(qr);
-      setShowQR(true);
+      await showQRCode(res.peer_id, res.name);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -235,10 +233,20 @@ export default function TunnelPlatform() {
     }
   };
 
-  const showQRCode = async (peerId) => {
+  const showQRCode = async (peerId, peerName) => {
     try {
-      const data = await apiFetch(`/peers/${peerId}/qr`);
-      setQrData(data);
+      // The endpoint returns an SVG image; fetch with auth and show via an object URL
+      const res = await fetch(`${API_BASE}/peers/${peerId}/qr`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      if (!res.ok) throw new Error('QR generation failed');
+      const blob = await res.blob();
+      const url = window.URL.createObjectURL(blob);
+      // Functional update: callers like createPeer hold a stale qrData from their render
+      setQrData(prev => {
+        if (prev) window.URL.revokeObjectURL(prev.qr_code);
+        return { qr_code: url, peer_name: peerName };
+      });
       setShowQR(true);
     } catch (err) {
       setError('QR generation failed');
@@ -256,15 +264,15 @@ export default function TunnelPlatform() {
         
         setTimeout(() => {
           setSuccess('Opening WireGuard app... Or scan QR code below');
-          showQRCode(peerId);
+          showQRCode(peerId, peerName);
         }, 1000);
       } catch (err) {
-        showQRCode(peerId);
+        showQRCode(peerId, peerName);
       }
     } else {
       // Desktop: show QR and download
       downloadConfig(peerId, peerName);
-      showQRCode(peerId);
+      showQRCode(peerId, peerName);
     }
   };
 
@@ -517,7 +525,7 @@ export default function TunnelPlatform() {
                           Config
                         </button>
                         <button
-                          onClick={() => showQRCode(p.id)}
+                          onClick={() => showQRCode(p.id, p.name)}
                           className="bg-purple-600 text-white px-3 py-2 rounded-lg text-xs hover:bg-purple-700 flex items-center justify-center gap-1 transition"
                         >
                           <QrCode className="w-3 h-3" />
@@ -1,79 +1,95 @@
 # setup_aws.py - Helper script to configure AWS resources
 import boto3
 import os
+import re
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Inbound rules for the tunnel security group, built once. The outer sequence and each
+# IpRanges are tuples (botocore accepts them for list shapes); the rule dicts stay plain
+# dicts so botocore takes the constant as-is, with no per-call copy
+TUNNEL_INGRESS_RULES = tuple(
+    {
+        'IpProtocol': protocol,
+        'FromPort': port,
+        'ToPort': port,
+        'IpRanges': ({'CidrIp': '0.0.0.0/0', 'Description': description},)
+    }
+    for protocol, port, description in (
+        ('tcp', 22, 'SSH'),
+        ('udp', 51820, 'WireGuard'),
+        ('icmp', -1, 'Ping'),
+    )
+)
+
+@lru_cache()
+def get_session(region: str = None) -> boto3.session.Session:
+    """One boto3 Session per region: credentials and endpoints resolve once, shared by every client"""
+    return boto3.session.Session(region_name=region or os.getenv('AWS_REGION', 'us-east-1'))
+
 def setup_aws_resources():
     """Setup AWS security group and key pair"""
-    ec2 = boto3.client('ec2', region_name=os.getenv('AWS_REGION', 'us-east-1'))
+    ec2 = get_session().client('ec2')
     
     print("🔧 Setting up AWS resources...")
     
-    # 1. Create Security Group
-    try:
-        sg_response = ec2.create_security_group(
-            GroupName='tunnel-platform-sg',
-            Description='Security group for Tunnel Platform VPN servers'
-        )
-        sg_id = sg_response['GroupId']
-        print(f"✅ Created security group: {sg_id}")
+    # 1. Create Security Group (skipped once SECURITY_GROUP_ID is in .env from an earlier run)
+    sg_id = os.getenv('SECURITY_GROUP_ID')
+    if sg_id:
+        print(f"ℹ️  Using configured security group: {sg_id}")
+    else:
+        try:
+            sg_response = ec2.create_security_group(
+                GroupName='tunnel-platform-sg',
+                Description='Security group for Tunnel Platform VPN servers'
+            )
+            sg_id = sg_response['GroupId']
+            print(f"✅ Created security group: {sg_id}")
         
-        # Add inbound rules
-        ec2.authorize_security_group_ingress(
-            GroupId=sg_id,
-            IpPermissions=[
-                {
-                    'IpProtocol': 'tcp',
-                    'FromPort': 22,
-                    'ToPort': 22,
-                    'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'SSH'}]
-                },
-                {
-                    'IpProtocol': 'udp',
-                    'FromPort': 51820,
-                    'ToPort': 51820,
-                    'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'WireGuard'}]
-                },
-                {
-                    'IpProtocol': 'icmp',
-                    'FromPort': -1,
-                    'ToPort': -1,
-                    'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'Ping'}]
-                }
-            ]
-        )
-        print("✅ Added security group rules")
+            # Add inbound rules
+            # All rules in one call
+            ec2.authorize_security_group_ingress(GroupId=sg_id, IpPermissions=TUNNEL_INGRESS_RULES)
+            print("✅ Added security group rules")
         
-    except ec2.exceptions.ClientError as e:
-        if 'InvalidGroup.Duplicate' in str(e):
-            # Get existing security group
-            sgs = ec2.describe_security_groups(GroupNames=['tunnel-platform-sg'])
-            sg_id = sgs['SecurityGroups'][0]['GroupId']
-            print(f"ℹ️  Using existing security group: {sg_id}")
-        else:
-            raise
+        except ec2.exceptions.ClientError as e:
+            if 'InvalidGroup.Duplicate' in str(e):
+                # Take the id from the error when AWS includes it; describe only as a fallback
+                match = re.search(r'sg-[0-9a-f]+', e.response['Error']['Message'])
+                if match:
+                    sg_id = match.group(0)
+                else:
+                    sgs = ec2.describe_security_groups(GroupNames=['tunnel-platform-sg'])
+                    sg_id = sgs['SecurityGroups'][0]['GroupId']
+                print(f"ℹ️  Using existing security group: {sg_id}")
+            else:
+                raise
     
-    # 2. Get latest Ubuntu AMI
-    try:
-        ami_response = ec2.describe_images(
-            Owners=['099720109477'],  # Canonical
-            Filters=[
-                {'Name': 'name', 'Values': ['ubuntu/images/hvm-ssd/ubuntu-jammy-22.04-amd64-server-*']},
-                {'Name': 'state', 'Values': ['available']}
-            ]
-        )
+    # 2. Get latest Ubuntu AMI (reuses AMI_ID from .env unless REFRESH_AMI=1)
+    ami_id = os.getenv('AMI_ID')
+    if ami_id and os.getenv('REFRESH_AMI') != '1':
+        print(f"ℹ️  Using configured AMI: {ami_id} (set REFRESH_AMI=1 to look up the latest)")
+    else:
+        try:
+            ami_response = ec2.describe_images(
+                Owners=['099720109477'],  # Canonical
+                Filters=[
+                    {'Name': 'name', 'Values': ['ubuntu/images/hvm-ssd/ubuntu-jammy-22.04-amd64-server-*']},
+                    {'Name': 'state', 'Values': ['available']}
+                ]
+            )
         
-        # Sort by creation date and get latest
-        images = sorted(ami_response['Images'], key=lambda x: x['CreationDate'], reverse=True)
-        ami_id = images[0]['ImageId']
-        print(f"✅ Found Ubuntu AMI: {ami_id}")
+            # Newest by creation date: one pass, no sorted copy (ISO timestamps compare as strings)
+            ami_id = max(ami_response['Images'], key=itemgetter('CreationDate'))['ImageId']
+            print(f"✅ Found Ubuntu AMI: {ami_id}")
         
-    except Exception as e:
-        print(f"❌ Error finding AMI: {e}")
-        ami_id = "ami-0866a3c8686eaeeba"  # Fallback
-        print(f"ℹ️  Using fallback AMI: {ami_id}")
+        except Exception as e:
+            print(f"❌ Error finding AMI: {e}")
+            ami_id = "ami-0866a3c8686eaeeba"  # Fallback
+            print(f"ℹ️  Using fallback AMI: {ami_id}")
     
     # 3. Update .env file
     print("\n📝 Updating .env file...")
@@ -84,27 +100,21 @@ def setup_aws_resources():
     }
     
     # Read existing .env
-    env_path = '.env'
-    if os.path.exists(env_path):
-        with open(env_path, 'r') as f:
-            lines = f.readlines()
-    else:
-        lines = []
+    env_path = Path('.env')
+    lines = env_path.read_text().splitlines(keepends=True) if env_path.exists() else []
     
-    # Update or add values
-    for key, value in env_updates.items():
-        found = False
-        for i, line in enumerate(lines):
-            if line.startswith(f'{key}='):
-                lines[i] = f'{key}={value}\n'
-                found = True
-                break
-        if not found:
-            lines.append(f'{key}={value}\n')
+    # Update or add values in one pass over the file
+    pending = dict(env_updates)
+    for i, line in enumerate(lines):
+        key = line.split('=', 1)[0]
+        if key in pending:
+            lines[i] = f'{key}={pending.pop(key)}\n'
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    lines.extend(f'{key}={value}\n' for key, value in pending.items())
     
     # Write back
-    with open(env_path, 'w') as f:
-        f.writelines(lines)
+    env_path.write_text(''.join(lines))
     
     print("\n✅ AWS setup complete!")
     print(f"\n📋 Add these to your .env file if not already present:")